@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
 from folhainvest import (FolhaInvest, Portfolio, Stock,
                          Profitability, Overview, Info,
-                         OrderStatus, Quote, SimulatorTrade, Status)
\ No newline at end of file
+                         OrderStatus, Quote, SimulatorTrade, Status,
+                         Snapshot, FolhaInvestError)
\ No newline at end of file
@@ -1,11 +1,20 @@
 # -*- coding: utf-8 -*-
 
+import functools
+import inspect
+import numbers
 import os.path
-import re
-from collections import defaultdict, namedtuple
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from lxml import etree
+from lxml import html as lxml_html
+from urllib3.util import Retry, make_headers
 
 Portfolio = namedtuple('Portfolio', 'stocks overview annual_profit monthly_profit')
 Stock = namedtuple('Stock', 'symbol name quantity avg_value current_value total_value profit variation')
@@ -17,6 +26,235 @@ OrderStatus = namedtuple('OrderStatus', 'id type symbol quantity value expiratio
 Quote = namedtuple('Quote', 'symbol name last_trade trade_time variation open close high low volume')
 SimulatorTrade = namedtuple('SimulatorTrade', 'symbol executed pending total')
 Status = namedtuple('Status', 'status_code description')
+Snapshot = namedtuple('Snapshot', 'info portfolio quotations orders_status simulator_trades')
+
+
+class FolhaInvestError(Exception):
+  """Sinaliza que o servidor retornou uma página diferente da esperada."""
+
+
+# Número máximo de requisições simultâneas ao servidor
+_MAX_WORKERS = 8
+
+
+# Expressões XPath pré-compiladas, reutilizadas em todas as requisições
+_FI_TABLES  = etree.XPath("//table[contains(concat(' ', normalize-space(@class), ' '), ' fiTable ')]")
+_LOG_TABLES = etree.XPath("//table[contains(concat(' ', normalize-space(@class), ' '), ' logTable ')]")
+_ROWS       = etree.XPath(".//tr")
+_COLS       = etree.XPath("./td")
+_TEXT       = etree.XPath("string()")
+_PLAIN_TEXT = etree.XPath("string()", smart_strings=False)
+_B_TEXT     = etree.XPath("string(.//b)")
+_INPUT      = etree.XPath("string(.//input/@value)")
+_USER_INFO  = etree.XPath("(//*[@id='userInfo'])[1]//p")
+_P_TEXT     = etree.XPath("string(./text()[normalize-space()])")
+_WARNING    = etree.XPath("//*[@class='message warning']")
+_H2_TEXT    = etree.XPath("string((.//h2)[1])", smart_strings=False)
+
+# Variantes que desconsideram o conteúdo das tabelas 'marker', aninhadas na
+# tabela de negociações
+_NOT_MARKER     = "not(ancestor::table[contains(concat(' ', normalize-space(@class), ' '), ' marker ')])"
+_UNMARKED_ROWS  = etree.XPath(".//tr[%s]" % _NOT_MARKER)
+_UNMARKED_TEXT  = etree.XPath(".//text()[%s]" % _NOT_MARKER)
+_UNMARKED_LINK  = etree.XPath(".//a[%s]" % _NOT_MARKER)
+
+
+def _parse(response):
+  """Constrói a árvore html a partir do corpo bruto da resposta.
+
+  Os bytes são entregues diretamente ao lxml, que identifica a codificação
+  pela tag <meta> do documento. A codificação da resposta só é imposta
+  quando declarada explicitamente no cabeçalho Content-Type.
+  """
+  encoding = None
+  if 'charset' in response.headers.get('content-type', ''):
+    encoding = response.encoding
+
+  parser = lxml_html.HTMLParser(encoding=encoding)
+  return lxml_html.fromstring(response.content, parser=parser)
+
+
+def _check_content(response, marker):
+  """Verifica se o corpo bruto da resposta contém o marcador esperado.
+
+  O teste é feito sobre os bytes, antes da construção da árvore, de modo que
+  páginas inesperadas (ex. login após a sessão expirar) não são analisadas.
+  """
+  if marker not in response.content:
+    raise FolhaInvestError('Conteúdo esperado não encontrado na página')
+
+
+def _first_table(tables):
+  """Retorna a primeira tabela encontrada na página.
+
+  A tabela de resultados está presente mesmo quando não há registros; sua
+  ausência indica uma página inesperada, como a de login após a sessão
+  expirar.
+  """
+  if not tables:
+    raise FolhaInvestError('Tabela de resultados não encontrada na página')
+  return tables[0]
+
+
+def _cast_float(text):
+  """Converte uma string para float."""
+  return float(text.replace('.', '').replace(',', '.'))
+
+
+def _cast_int(text):
+  """Converte uma string para int."""
+  return int(text.replace('.', ''))
+
+
+def _cast_rank(text):
+  """Converte string contendo indicador ordinal para int."""
+  return _cast_int(text.partition(' ')[0])
+
+
+def _cast_currency(text):
+  """Converte string no formato de moeda para float."""
+  _, _, value = text.strip().partition(' ')
+  return _cast_float(value.partition(' ')[0])
+
+
+def _cast_percentage(text):
+  """Converte string no formato de porcentagem para float."""
+  return _cast_float(text.replace('%', ''))
+
+
+def _get_symbol(html):
+  """Retorna nome da empresa a partir de uma tag html 'a'."""
+  return ''.join(html.itertext()).strip()
+
+
+def _cell(cast):
+  """Cria um conversor que aplica cast ao texto de uma célula."""
+  def convert(cell):
+    return cast(_TEXT(cell))
+  return convert
+
+
+def _cell_bold(cell):
+  """Retorna o texto em negrito de uma célula."""
+  return str(_B_TEXT(cell))
+
+
+def _cell_unmarked(cast):
+  """Cria um conversor que aplica cast ao texto da célula fora das tabelas 'marker'."""
+  def convert(cell):
+    return cast(''.join(_UNMARKED_TEXT(cell)))
+  return convert
+
+
+def _cell_link(cell):
+  """Retorna nome da empresa a partir do link contido na célula."""
+  return _get_symbol(_UNMARKED_LINK(cell)[0])
+
+
+def _cell_order_id(cell):
+  """Retorna o id da ordem contido no checkbox da célula."""
+  return int(_INPUT(cell))
+
+
+def _cell_order_value(cell):
+  """Converte o valor de uma ordem, fixando valores a mercado para 0."""
+  value = _TEXT(cell)
+  if 'mercado' in value:
+    return 0.0
+  return _cast_float(value)
+
+
+def _row_reader(cls, schema):
+  """Cria uma função que converte as células de uma linha em uma tupla cls.
+
+  O esquema contém um par (índice da coluna, conversor) para cada campo de
+  cls, na ordem em que os campos são declarados.
+  """
+  def read(cols):
+    return cls._make([convert(cols[index]) for index, convert in schema])
+  return read
+
+
+# Esquemas das linhas de cada tabela
+_read_order_status = _row_reader(OrderStatus, [
+  (0, _cell_order_id),      # id
+  (1, _cell_bold),          # type
+  (2, _cell_bold),          # symbol
+  (3, _cell(_cast_int)),    # quantity
+  (4, _cell_order_value),   # value
+  (5, _cell(str)),          # expiration_date
+  (6, _cell_bold)           # status
+])
+
+_read_stock = _row_reader(Stock, [
+  (0, _get_symbol),         # symbol
+  (1, _PLAIN_TEXT),         # name
+  (4, _cell(_cast_int)),    # quantity
+  (5, _cell(_cast_float)),  # avg_value
+  (6, _cell(_cast_float)),  # current_value
+  (7, _cell(_cast_float)),  # total_value
+  (8, _cell(_cast_float)),  # profit
+  (9, _cell(_cast_float))   # variation
+])
+
+_read_quote = _row_reader(Quote, [
+  (1, _cell_bold),               # symbol
+  (3, _cell(str)),               # name
+  (5, _cell(_cast_float)),       # last_trade
+  (6, _cell(str)),               # trade_time
+  (7, _cell(_cast_percentage)),  # variation
+  (8, _cell(_cast_float)),       # open
+  (9, _cell(_cast_float)),       # close
+  (10, _cell(_cast_float)),      # high
+  (11, _cell(_cast_float)),      # low
+  (12, _cell(_cast_int))         # volume
+])
+
+_read_simulator_trade = _row_reader(SimulatorTrade, [
+  (0, _cell_link),                 # symbol
+  (1, _cell_unmarked(_cast_int)),  # executed
+  (2, _cell_unmarked(_cast_int)),  # pending
+  (3, _cell_unmarked(_cast_int))   # total
+])
+
+
+def _ttl_cache(seconds):
+  """Memoiza o resultado de um método da API durante alguns segundos.
+
+  O método decorado passa a aceitar o argumento 'ttl', que substitui o tempo
+  padrão em cada chamada; 'ttl=None' mantém o tempo padrão e 'ttl=0' ignora
+  o cache. Os argumentos são associados à assinatura do método, de modo que
+  _quotations('') e _quotations(view='') compartilham a mesma entrada. A
+  chave inclui a época da instância, de modo que resultados obtidos antes de
+  uma operação que altera a carteira nunca são reaproveitados.
+
+  Como o mesmo objeto é devolvido a todos os chamadores, os métodos
+  decorados devem retornar valores imutáveis; os métodos públicos entregam
+  cópias em lista.
+  """
+  def decorator(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+      ttl = kwargs.pop('ttl', None)
+      if ttl is None:
+        ttl = seconds
+      if ttl <= 0:
+        return method(self, *args, **kwargs)
+
+      call = inspect.getcallargs(method, self, *args, **kwargs)
+      del call['self']
+      key = (method.__name__, self._epoch, tuple(sorted(call.items())))
+      now = time.time()
+
+      entry = self._cache.get(key)
+      if entry is not None and now - entry[0] < ttl:
+        return entry[1]
+
+      value = method(self, *args, **kwargs)
+      self._cache[key] = (now, value)
+      return value
+    return wrapper
+  return decorator
 
 
 class FolhaInvest(object):
@@ -35,39 +273,46 @@ class FolhaInvest(object):
     self._session = requests.session()
     self._host = 'http://folhainvest.folha.uol.com.br'
 
+    # URLs das páginas acessadas, montadas uma única vez
+    self._url_ordens       = self._geturl('ordens')
+    self._url_carteira     = self._geturl('carteira')
+    self._url_carteira_tsv = self._geturl('carteira?tsv=yes')
+    self._url_cotacoes     = self._geturl('cotacoes')
+    self._url_negociacoes  = self._geturl('negociacoes')
+    self._url_comprar      = self._geturl('comprar')
+    self._url_vender       = self._geturl('vender')
+    self._url_start        = self._geturl('start')
+    self._url_stop         = self._geturl('stop')
+    self._url_limpar       = self._geturl('limpar')
+
+    # Cache de consultas, invalidado a cada operação na carteira
+    self._cache = {}
+    self._epoch = 0
+
+    # Mantém conexões abertas para reuso entre chamadas (inclusive
+    # concorrentes) e repete requisições idempotentes em falhas do servidor.
+    # Esgotadas as tentativas, a última resposta é devolvida normalmente.
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                    raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+    self._session.mount('http://', adapter)
+    self._session.mount('https://', adapter)
+
+    # Solicita páginas comprimidas em todos os formatos que o urllib3 sabe
+    # decodificar. O requests anterior à versão 2.26 envia apenas 'gzip,
+    # deflate'; com o pacote brotli instalado, 'br' passa a ser anunciado.
+    self._session.headers.update(make_headers(accept_encoding=True))
+
 
   def _geturl(self, page):
     """Retorna a url completa para requisição."""
-    return '%s/%s' % (self._host, page) 
-
-
-  def _get_symbol(self, html):
-    """Retorna nome da empresa a partir de uma tag html 'a'."""
-    return ''.join(re.findall('\>(.*?)\<', str(html)))
-
-
-  def _cast_float(self, text):
-    """Converte uma string para float."""
-    return float(text.replace('.', '').replace(',', '.'))
-
-
-  def _cast_int(self, text):
-    """Converte uma string para int."""
-    return int(text.replace('.', ''))
-
-
-  def _cast_rank(self, text):
-    """Converte string contendo indicador ordinal para int."""
-    return self._cast_int(text.split(' ')[0])
+    return self._host + '/' + page
 
 
-  def _cast_currency(self, text):
-    """Converte string no formato de moeda para float."""
-    return self._cast_float(text.strip().split(' ')[1])
-
-
-  def _cast_percentage(self, text):
-    return self._cast_float(text.replace('%', ''))
+  def clear_cache(self):
+    """Descarta os resultados de consultas memoizados."""
+    self._epoch += 1
+    self._cache.clear()
 
 
   def login(self, email, password):
@@ -95,6 +340,7 @@ class FolhaInvest(object):
     }
 
     r = self._session.post(url, data=payload)
+    self.clear_cache()
 
     # Verifica se foi possivel realizar o login
     if 'FOLHA_KEY' in r.headers['set-cookie']:
@@ -110,33 +356,45 @@ class FolhaInvest(object):
     )  
     
 
+  @_ttl_cache(seconds=2)
   def info(self):
     """Retorna informações gerais do desempenho.
 
+    Parameters
+    ----------
+    ttl : float ou None (default=None)
+            Tempo em segundos durante o qual um resultado anterior é
+            reaproveitado. None usa o padrão de 2 segundos e 0 sempre
+            consulta o servidor.
+
     Returns
     -------
     info : Info
           Retorna os valores em uma tupla.
+
+    Raises
+    ------
+    FolhaInvestError
+            Quando a página não contém as informações do usuário (ex. sessão
+            expirada ou página de erro).
     """
-    url = self._geturl('ordens')
+    url = self._url_ordens
     r = self._session.get(url)
+    _check_content(r, b'userInfo')
 
-    html = BeautifulSoup(r.text)
-    user_info = html.select('#userInfo')[0].select('p')
-    
-    # Remove tags desnecessárias
-    user_info[0].b.extract()
-    user_info[1].b.extract()
-    user_info[2].b.extract()
-    user_info[3].b.extract()
-    user_info[4].b.extract()
+    doc = _parse(r)
+
+    # Lê o texto de cada parágrafo ignorando o rótulo em negrito
+    user_info = [_P_TEXT(p) for p in _USER_INFO(doc)]
+    if len(user_info) < 5:
+      raise FolhaInvestError('Informações do usuário não encontradas na página')
 
     # Extrai dados e converte para os tipos apropriados
-    monthly_ranking = self._cast_rank(user_info[0].string)
-    annual_ranking  = self._cast_rank(user_info[1].string)
-    capital         = self._cast_currency(user_info[2].string)
-    daily_limit     = self._cast_currency(user_info[3].string)
-    remaining_limit = self._cast_currency(user_info[4].string)
+    monthly_ranking = _cast_rank(user_info[0])
+    annual_ranking  = _cast_rank(user_info[1])
+    capital         = _cast_currency(user_info[2])
+    daily_limit     = _cast_currency(user_info[3])
+    remaining_limit = _cast_currency(user_info[4])
 
     return Info(
       capital         = capital,
@@ -156,7 +414,8 @@ class FolhaInvest(object):
             Nome da empresa (ex. ABEV3, PETR4, etc).
     
     value : string ou float
-            Valor da compra (ex. '12,45' ou 12.45).
+            Valor da compra (ex. '12,45' ou 12.45). Valores numéricos são
+            arredondados para centavos.
     
     quantity : string ou int
             Volume da compra (ex. '1.000' ou 1000).
@@ -172,7 +431,7 @@ class FolhaInvest(object):
     status : Status
              Retorna o estado da submissão.
     """
-    url = self._geturl('comprar')
+    url = self._url_comprar
     return self._order(url, symbol, value, quantity, expiration_date, pricing)
 
 
@@ -185,7 +444,8 @@ class FolhaInvest(object):
             Nome da empresa (ex. ABEV3, PETR4, etc).
     
     value : string ou float
-            Valor da compra (ex. '12,45' ou 12.45).
+            Valor da compra (ex. '12,45' ou 12.45). Valores numéricos são
+            arredondados para centavos.
     
     quantity : string ou int
             Volume da compra (ex. '1.000' ou 1000).
@@ -198,7 +458,7 @@ class FolhaInvest(object):
     status : Status
             Retorna o estado da submissão.
     """
-    url = self._geturl('start')
+    url = self._url_start
     return self._order(url, symbol, value, quantity, expiration_date, start_stop=1)
 
 
@@ -211,7 +471,8 @@ class FolhaInvest(object):
             Nome da empresa (ex. ABEV3, PETR4, etc).
     
     value : string ou float
-            Valor da venda (ex. '12,45' ou 12.45).
+            Valor da venda (ex. '12,45' ou 12.45). Valores numéricos são
+            arredondados para centavos.
     
     quantity : string ou int
             Volume da venda (ex. '1.000' ou 1000).
@@ -227,7 +488,7 @@ class FolhaInvest(object):
     status : Status
             Retorna o estado da submissão.
     """
-    url = self._geturl('vender')
+    url = self._url_vender
     return self._order(url, symbol, value, quantity, expiration_date, pricing, sell=1)
 
 
@@ -240,7 +501,8 @@ class FolhaInvest(object):
             Nome da empresa (ex. ABEV3, PETR4, etc).
     
     value : string ou float
-            Valor da venda (ex. '12,45' ou 12.45).
+            Valor da venda (ex. '12,45' ou 12.45). Valores numéricos são
+            arredondados para centavos.
     
     quantity : string ou int
             Volume da venda (ex. '1.000' ou 1000).
@@ -253,7 +515,7 @@ class FolhaInvest(object):
     status : Status
             Retorna o estado da submissão.
     """
-    url = self._geturl('stop')
+    url = self._url_stop
     return self._order(url, symbol, value, quantity, expiration_date, start_stop=1, sell=1)
 
 
@@ -272,7 +534,8 @@ class FolhaInvest(object):
             Nome da empresa (ex. ABEV3, PETR4, etc).
 
     value : string ou float
-            Valor da ordem (ex. '12,45' ou 12.45).
+            Valor da ordem (ex. '12,45' ou 12.45). Valores numéricos são
+            arredondados para centavos.
 
     quantity : string ou int
             Volume da ordem (ex. '1.000' ou 1000).
@@ -298,15 +561,13 @@ class FolhaInvest(object):
     status : Status
             Retorna o estado da submissão.
     """
-    # Valida os parâmetros  
-    if type(value) is float:
-      value = str(value).replace('.', ',')
-    elif type(value) is int:
-      value = str(float(value)).replace('.', ',')
-    elif type(value) is str:
+    # Valida os parâmetros
+    if isinstance(value, (numbers.Real, Decimal)) and not isinstance(value, bool):
+      value = format(float(value), '.2f').replace('.', ',')
+    elif isinstance(value, str):
       value = value.replace('.', ',')
 
-    if type(quantity) is float:
+    if isinstance(quantity, float):
       quantity = int(quantity)
 
     # Cria payload da requisição
@@ -326,16 +587,22 @@ class FolhaInvest(object):
 
     r = self._session.post(url, data=payload)
 
-    # Checa se algum erro ocorreu
-    warning = BeautifulSoup(r.text).find(class_='message warning')
+    # Checa se algum erro ocorreu. A página só é analisada quando o aviso
+    # está presente, evitando construir a árvore no caso de sucesso.
+    warning = None
+    if b'message warning' in r.content:
+      warning = _WARNING(_parse(r))
 
     if not warning:
       status_code = 'OK'
       description = 'Ordem enviada com sucesso'
       self._session.post(r.url, data={ 'confirm': 'Confirmar' })
+
+      # Só invalida o cache após a confirmação, que efetiva a ordem
+      self.clear_cache()
     else:
       status_code = 'FAIL'
-      description = warning.h2.string
+      description = _H2_TEXT(warning[0])
 
     return Status(
       status_code = status_code,
@@ -359,15 +626,22 @@ class FolhaInvest(object):
     status : Status
             Retorna o estado da submissão.
     """
-    payload = defaultdict(list)
-    for id in orders_id:
-      payload['orders[]'].append(id)
-    payload['cancel'].append('Remover ordens')
+    # Nenhuma requisição é enviada para uma lista vazia
+    if not orders_id:
+      return Status(
+        status_code = 'FAIL',
+        description = 'Nenhuma ordem informada'
+      )
 
-    url = self._geturl('ordens')
+    # Cada id é enviado como um campo 'orders[]' repetido, em uma única requisição
+    payload = [('orders[]', id) for id in orders_id]
+    payload.append(('cancel', 'Remover ordens'))
+
+    url = self._url_ordens
     r = self._session.post(url, data=payload)
+    self.clear_cache()
 
-    if r.status_code == 200 and len(payload) > 1:
+    if r.ok:
       status_code = 'OK'
       description = 'Requisição enviada com sucesso'
     else:
@@ -397,93 +671,71 @@ class FolhaInvest(object):
             Retorna lista de OrderStatus contendo informações de cada
             ordem. Retorna uma lista vazia, caso nenhuma ordem seja
             encontrada.
+
+    Raises
+    ------
+    FolhaInvestError
+            Quando a página não contém a tabela esperada (ex. sessão
+            expirada ou página de erro).
     """
-    url = self._geturl('ordens?f=' + filter)
+    url = self._url_ordens + '?f=' + filter
     r = self._session.post(url)
-    result = []
-
-    html = BeautifulSoup(r.text)
-    for row in html.select('table.fiTable')[0].select('tr')[1:]:
-      cols  = row.select('td')
-
-      id              = int(cols[0].input['value'])
-      type            = str(cols[1].b.string)
-      symbol          = str(cols[2].b.string)
-      quantity        = self._cast_int(cols[3].string)
-      value           = cols[4].string
-      expiration_date = str(cols[5].string)
-      status          = str(cols[6].b.string)
-
-      # Valores a mercado são definidos para 0
-      if 'mercado' in value:
-        value = 0.0
-      else:
-        value = self._cast_float(value)
-
-      order_status = OrderStatus(
-        id              = id,
-        type            = type,
-        symbol          = symbol,
-        quantity        = quantity,
-        value           = value,
-        expiration_date = expiration_date,
-        status          = status
-      )
-
-      result.append(order_status)
+    _check_content(r, b'fiTable')
 
-    return result
+    doc = _parse(r)
+    rows = _ROWS(_first_table(_FI_TABLES(doc)))[1:]
+    return [_read_order_status(_COLS(row)) for row in rows]
 
 
-  def portfolio(self):
+  def portfolio(self, ttl=None):
     """Retorna informações referentes a carteira.
 
+    Parameters
+    ----------
+    ttl : float ou None (default=None)
+            Tempo em segundos durante o qual um resultado anterior é
+            reaproveitado. None usa o padrão de 2 segundos e 0 sempre
+            consulta o servidor.
+
     Returns
     -------
     portfolio : Portfolio
             Retorna uma tupla Portfolio contendo as informações encontradas.
+
+    Raises
+    ------
+    FolhaInvestError
+            Quando a página não contém as tabelas da carteira (ex. sessão
+            expirada ou página de erro).
     """
-    url = self._geturl('carteira')
+    portfolio = self._portfolio(ttl=ttl)
+    return portfolio._replace(stocks=list(portfolio.stocks))
+
+
+  @_ttl_cache(seconds=2)
+  def _portfolio(self):
+    """Obtém a carteira, mantendo as ações em uma tupla para o cache."""
+    url = self._url_carteira
     r = self._session.get(url)
-    html = BeautifulSoup(r.text)
+    _check_content(r, b'fiTable')
+    doc = _parse(r)
 
-    tables = html.select('table.fiTable')
+    tables = _FI_TABLES(doc)
+    if len(tables) < 4:
+      raise FolhaInvestError('Tabelas da carteira não encontradas na página')
     table_stocks         = tables[0]
     table_overview       = tables[1]
     table_annual_profit  = tables[2]
     table_monthly_profit = tables[3]
 
     # Extrai informações de ações da carteira
-    stocks = []
-    for row in table_stocks.select('tr')[1:-1]:
-      cols = row.select('td')
-
-      symbol        = self._get_symbol(cols[0])
-      name          = cols[1].string
-      quantity      = self._cast_int(cols[4].string)
-      avg_value     = self._cast_float(cols[5].string)
-      current_value = self._cast_float(cols[6].string)
-      total_value   = self._cast_float(cols[7].string)
-      profit        = self._cast_float(cols[8].string)
-      variation     = self._cast_float(cols[9].string)
-
-      stock = Stock(
-        symbol        = symbol,
-        name          = name,
-        quantity      = quantity,
-        avg_value     = avg_value,
-        current_value = current_value,
-        total_value   = total_value,
-        profit        = profit,
-        variation     = variation
-      )
-      stocks.append(stock)
+    stocks = tuple(_read_stock(_COLS(row)) for row in _ROWS(table_stocks)[1:-1])
 
     # Extrai informações gerais
-    cols = table_overview.select('tr')[1].select('td')
-    total_capital = self._cast_float(cols[0].string)
-    total_stocks  = self._cast_float(cols[1].string)
-    total         = self._cast_float(cols[2].string)
+    cols = _COLS(_ROWS(table_overview)[1])
+    total_capital = _cast_float(_TEXT(cols[0]))
+    total_stocks  = _cast_float(_TEXT(cols[1]))
+    total         = _cast_float(_TEXT(cols[2]))
 
     overview = Overview(
       total_capital = total_capital,
@@ -492,10 +744,10 @@ class FolhaInvest(object):
     )
 
     # Extrai Rentabilidade Anual
-    rows = table_annual_profit.select('tr')[1:]
-    a_initial_position    = self._cast_float(rows[0].select('td')[1].string)
-    a_current_position    = self._cast_float(rows[1].select('td')[1].string)
-    a_current_performance = self._cast_percentage(rows[2].select('td')[1].string)
+    rows = _ROWS(table_annual_profit)[1:]
+    a_initial_position    = _cast_float(_TEXT(_COLS(rows[0])[1]))
+    a_current_position    = _cast_float(_TEXT(_COLS(rows[1])[1]))
+    a_current_performance = _cast_percentage(_TEXT(_COLS(rows[2])[1]))
 
     annual_profit = Profitability(
       initial_position    = a_initial_position,
@@ -504,10 +756,10 @@ class FolhaInvest(object):
     )
 
     # Extrai Rentabilidade Mensal
-    rows = table_monthly_profit.select('tr')[1:]
-    m_initial_position    = self._cast_float(rows[0].select('td')[1].string)
-    m_current_position    = self._cast_float(rows[1].select('td')[1].string)
-    m_current_performance = self._cast_percentage(rows[2].select('td')[1].string)
+    rows = _ROWS(table_monthly_profit)[1:]
+    m_initial_position    = _cast_float(_TEXT(_COLS(rows[0])[1]))
+    m_current_position    = _cast_float(_TEXT(_COLS(rows[1])[1]))
+    m_current_performance = _cast_percentage(_TEXT(_COLS(rows[2])[1]))
 
     monthly_profit = Profitability(
       initial_position    = m_initial_position,
@@ -531,11 +783,12 @@ class FolhaInvest(object):
     status : Status
             Retorna o estado da submissão.
     """
-    url = self._geturl('limpar')
+    url = self._url_limpar
     r = self._session.get(url)
 
     # Confirma automaticamente
     r = self._session.post(r.url, data={ 'confirm': 'Confirmar' })
+    self.clear_cache()
 
     if r.status_code == 200:
       status_code = 'OK'
@@ -564,14 +817,14 @@ class FolhaInvest(object):
     status : Status
             Retorna o estado do download.
     """
-    url = self._geturl('carteira?tsv=yes')
-    r = self._session.get(url)
+    url = self._url_carteira_tsv
 
-    if r.status_code == 200:
-      with open(filepath, 'wb') as f:
-        for chunk in r.iter_content(chunk_size=1024):
-          if chunk:
-            f.write(chunk)
+    # Copia o corpo da resposta diretamente para o arquivo, em blocos de 64 KiB
+    with self._session.get(url, stream=True) as r:
+      if r.status_code == 200:
+        r.raw.decode_content = True
+        with open(filepath, 'wb') as f:
+          shutil.copyfileobj(r.raw, f, 64 * 1024)
 
     if os.path.exists(filepath):
       status_code = 'OK'
@@ -586,7 +839,7 @@ class FolhaInvest(object):
     )
 
 
-  def quotations(self, view=''):
+  def quotations(self, view='', ttl=None):
     """Retorna as cotações.
 
     Parameters
@@ -595,48 +848,62 @@ class FolhaInvest(object):
             Lista todas as empresas ('') ou somente empresas existentes na
             carteira ('portfolio').
 
+    ttl : float ou None (default=None)
+            Tempo em segundos durante o qual um resultado anterior é
+            reaproveitado. None usa o padrão de 5 segundos e 0 sempre
+            consulta o servidor.
+
     Returns
     -------
     quotations : list
             Retorna lista de Quote contendo a cotação de cada empresa.
-            Um lista vazia é retornada quando não for possível encontrar
+            Uma lista vazia é retornada quando não for possível encontrar
             cotações.
+
+    Raises
+    ------
+    FolhaInvestError
+            Quando a página não contém a tabela esperada (ex. sessão
+            expirada ou página de erro).
     """
-    url = self._geturl('cotacoes?view_option=' + view)
+    return list(self._quotations(view, ttl=ttl))
+
+
+  @_ttl_cache(seconds=5)
+  def _quotations(self, view):
+    """Obtém as cotações em uma tupla, compartilhada pelo cache."""
+    url = self._url_cotacoes + '?view_option=' + view
     r = self._session.get(url)
-    result = []
-
-    html = BeautifulSoup(r.text)
-    for row in html.select('table.fiTable')[0].select('tr')[1:]:
-      cols = row.select('td')
-
-      symbol     = str(cols[1].b.string)
-      name       = str(cols[3].string)
-      last_trade = self._cast_float(cols[5].string)
-      trade_time = str(cols[6].string)
-      variation  = self._cast_percentage(cols[7].string)
-      open       = self._cast_float(cols[8].string)
-      close      = self._cast_float(cols[9].string)
-      high       = self._cast_float(cols[10].string)
-      low        = self._cast_float(cols[11].string)
-      volume     = self._cast_int(cols[12].string)
-
-      quote = Quote(
-        symbol     = symbol,
-        name       = name,
-        last_trade = last_trade,
-        trade_time = trade_time,
-        variation  = variation,
-        open       = open,
-        close      = close,
-        high       = high,
-        low        = low,
-        volume     = volume
-      )
+    _check_content(r, b'fiTable')
+
+    doc = _parse(r)
+    rows = _ROWS(_first_table(_FI_TABLES(doc)))[1:]
+    return tuple(_read_quote(_COLS(row)) for row in rows)
 
-      result.append(quote)
 
-    return result
+  def quotations_for(self, symbols, view=''):
+    """Retorna as cotações de um conjunto de empresas.
+
+    Todas as cotações são obtidas em uma única requisição e filtradas
+    localmente, evitando uma requisição por empresa.
+
+    Parameters
+    ----------
+    symbols : list
+            Nomes das empresas (ex. ['ABEV3', 'PETR4']).
+
+    view : '' ou 'portfolio', (default='')
+            Lista todas as empresas ('') ou somente empresas existentes na
+            carteira ('portfolio').
+
+    Returns
+    -------
+    quotations : list
+            Retorna lista de Quote das empresas encontradas, na ordem em
+            que aparecem na página.
+    """
+    symbols = set(symbols)
+    return [quote for quote in self._quotations(view) if quote.symbol in symbols]
 
 
   def simulator_trades(self):
@@ -648,32 +915,73 @@ class FolhaInvest(object):
             Retorna uma lista de objetos SimulatorTrade contendo o número
             de negociações realizadas no simulador em cada empresa. Uma lista
             vazia é retornada caso nenhum valor seja encontrado.
+
+    Raises
+    ------
+    FolhaInvestError
+            Quando a página não contém a tabela esperada (ex. sessão
+            expirada ou página de erro).
     """
-    url = self._geturl('negociacoes')
+    url = self._url_negociacoes
     r = self._session.get(url)
-    result = []
+    _check_content(r, b'logTable')
 
-    html = BeautifulSoup(r.text)
+    doc = _parse(r)
 
-    # Remove tabelas desnecessárias
-    [m.extract() for m in html.find_all('table', class_='marker')]
+    # Desconsidera as tabelas 'marker' aninhadas. Ignora primeira e última
+    # posição da lista
+    rows = _UNMARKED_ROWS(_first_table(_LOG_TABLES(doc)))[1:-1]
+    return [_read_simulator_trade(_COLS(row)) for row in rows]
 
-    # Ignora primeira e última posição da lista
-    for row in html.find('table', class_='logTable').select('tr')[1:-1]:
-      cols = row.select('td')
 
-      symbol   = self._get_symbol(cols[0].a)
-      executed = self._cast_int(cols[1].string)
-      pending  = self._cast_int(cols[2].string)
-      total    = self._cast_int(cols[3].string)
+  def gather(self, *calls):
+    """Executa chamadas independentes concorrentemente.
 
-      simulator_trade = SimulatorTrade(
-        symbol   = symbol,
-        executed = executed,
-        pending  = pending,
-        total    = total
-      )
+    As requisições são enviadas em paralelo, compartilhando a mesma sessão,
+    de modo que o tempo total se aproxima ao da requisição mais lenta.
+
+    Parameters
+    ----------
+    calls : callable
+            Métodos a serem executados, sem argumentos (ex. fi.info,
+            fi.portfolio). Use functools.partial para fornecer argumentos.
+
+    Returns
+    -------
+    results : list
+            Retorna lista com o resultado de cada chamada, na mesma ordem
+            em que foram fornecidas.
+    """
+    if not calls:
+      return []
+
+    workers = min(len(calls), _MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+      futures = [executor.submit(call) for call in calls]
+      return [future.result() for future in futures]
+
+
+  def snapshot(self):
+    """Retorna o estado completo da conta em uma única chamada.
 
-      result.append(simulator_trade)
+    As páginas de informações, carteira, cotações, ordens e negociações são
+    requisitadas concorrentemente (ver gather).
 
-    return result
\ No newline at end of file
+    Returns
+    -------
+    snapshot : Snapshot
+            Retorna uma tupla com os resultados de info, portfolio,
+            quotations, orders_status e simulator_trades.
+    """
+    return Snapshot._make(self.gather(
+      self.info,
+      self.portfolio,
+      self.quotations,
+      self.orders_status,
+      self.simulator_trades
+    ))
+
+
+  def close(self):
+    """Encerra a sessão, liberando as conexões mantidas abertas."""
+    self._session.close()
@@ -11,7 +11,9 @@ setup(name='folhainvest',
       license='MIT',
       packages=['folhainvest'],
       install_requires=[
-        'requests',
-        'beautifulsoup4'
+        'requests>=2.18',
+        'urllib3',
+        'lxml',
+        'futures; python_version < "3"'
       ],
       zip_safe=False)
\ No newline at end of file
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+try:
+  from urllib.parse import unquote
+except ImportError:
+  from urllib import unquote
+
+import requests
+
+from folhainvest import (FolhaInvest, Info, OrderStatus, Stock, Overview,
+                         Profitability, Quote, SimulatorTrade)
+
+
+# Páginas de exemplo, reduzidas à estrutura lida por cada método. Os valores
+# esperados nos testes são os produzidos pela implementação original, baseada
+# no BeautifulSoup.
+ORDENS = u'''<html><head><meta charset="utf-8"></head><body>
+<div id="userInfo">
+<p><b>Ranking mensal: </b>1.234 º lugar</p>
+<p><b>Ranking anual: </b>56 º lugar</p>
+<p><b>Capital: </b> R$ 1.000.000,50</p>
+<p><b>Limite diário: </b> R$ 200.000,00</p>
+<p><b>Limite restante: </b> R$ 150.000,25</p>
+</div>
+<table class="fiTable orders">
+<tr><th>id</th><th>tipo</th></tr>
+<tr><td><label><input type="checkbox" name="orders[]" value="55"></label></td><td><b>Compra</b></td><td><a href="#"><b>PETR4</b></a></td><td>1.000</td><td>12,34</td><td>31/12/2100</td><td><b>Pendente</b></td></tr>
+<tr><td><input type="checkbox" name="orders[]" value="56"></td><td><b>Venda</b></td><td><b>VALE5</b></td><td>200</td><td>a mercado</td><td>01/01/2101</td><td><b>Executada</b></td></tr>
+</table></body></html>'''
+
+CARTEIRA = u'''<html><head><meta charset="utf-8"></head><body>
+<table class="fiTable"><thead><tr><th>a</th></tr></thead><tbody>
+<tr><td>
+  <a href="/x">PETR4</a>
+</td><td>PETROBRAS PN</td><td>x</td><td>y</td><td>1.000</td><td>10,50</td><td>11,00</td><td>11.000,00</td><td>500,00</td><td>4,76</td></tr>
+<tr><td><a href="/y">VALE5</a></td><td>VALE PNA AÇÃO</td><td>x</td><td>y</td><td>200</td><td>30,00</td><td>29,00</td><td>5.800,00</td><td>-200,00</td><td>-3,33</td></tr>
+<tr><td colspan="10">Total</td></tr></tbody>
+</table>
+<table class="fiTable"><tr><th>a</th><th>b</th><th>c</th></tr><tr><td>983.200,00</td><td>16.800,00</td><td>1.000.000,00</td></tr></table>
+<table class="fiTable"><tr><th>anual</th></tr><tr><td>ini</td><td>1.000.000,00</td></tr><tr><td>cur</td><td>1.000.300,00</td></tr><tr><td>perf</td><td>0,03%</td></tr></table>
+<table class="fiTable"><tr><th>mensal</th></tr><tr><td>ini</td><td>990.000,00</td></tr><tr><td>cur</td><td>1.000.300,00</td></tr><tr><td>perf</td><td>1,04%</td></tr></table>
+</body></html>'''
+
+COTACOES = u'''<html><body><table class="fiTable">
+<tr><th>h</th></tr>
+<tr><td></td><td><b>PETR4</b></td><td></td><td>PETROBRAS PN</td><td></td><td>11,00</td><td>17:05</td><td>-1,25%</td><td>11,10</td><td>11,14</td><td>11,20</td><td>10,90</td><td>12.345.600</td></tr>
+<tr><td></td><td><a href="/q"><b>ABEV3</b></a></td><td></td><td>AMBEV ON</td><td></td><td>1.234,56</td><td>17:06</td><td>2,00%</td><td>1,10</td><td>1,14</td><td>1,20</td><td>1,90</td><td>100</td></tr>
+</table></body></html>'''
+
+NEGOCIACOES = u'''<html><body>
+<table class="marker"><tr><td>m</td></tr></table>
+<table class="logTable">
+<tr><th>s</th></tr>
+<tr><td><table class="marker"><tr><td><a href="#">zz</a></td></tr></table><a href="#"><span>PE</span>TR4</a></td><td>3<table class="marker"><tr><td>9</td></tr></table></td><td>1</td><td>4</td></tr>
+<tr><td><a href="#">VALE5</a><table class="marker"><tr><td>m</td></tr></table></td><td>1.002</td><td>0</td><td>1.002</td></tr>
+<tr><td>Total</td><td>5</td><td>1</td><td>6</td></tr>
+</table></body></html>'''
+
+
+class _Response(object):
+  ok = True
+  status_code = 200
+  headers = {}
+  encoding = None
+
+  def __init__(self, content=b''):
+    self.content = content
+
+
+class _Session(object):
+  """Sessão falsa que serve páginas fixas e guarda o corpo de cada POST."""
+
+  def __init__(self, pages=None):
+    self.pages = pages or {}
+    self.bodies = []
+
+  def get(self, url, **kwargs):
+    return self._respond(url)
+
+  def post(self, url, data=None):
+    prepared = requests.Request('POST', url, data=data).prepare()
+    self.bodies.append(prepared.body)
+    return self._respond(url)
+
+  def _respond(self, url):
+    page = url.rsplit('/', 1)[-1].split('?')[0]
+    return _Response(self.pages.get(page, u'').encode('utf-8'))
+
+
+class CancelTest(unittest.TestCase):
+
+  def setUp(self):
+    self.fi = FolhaInvest()
+    self.fi._session = _Session()
+
+  def test_cancel_repeats_orders_field(self):
+    status = self.fi.cancel([55, 56])
+    self.assertEqual(status.status_code, 'OK')
+    self.assertEqual(self.fi._session.bodies,
+                     ['orders%5B%5D=55&orders%5B%5D=56&cancel=Remover+ordens'])
+    # Os colchetes chegam ao servidor como um único campo 'orders[]' repetido
+    self.assertEqual(unquote(self.fi._session.bodies[0]),
+                     'orders[]=55&orders[]=56&cancel=Remover+ordens')
+
+  def test_cancel_empty_list_sends_nothing(self):
+    status = self.fi.cancel([])
+    self.assertEqual(status.status_code, 'FAIL')
+    self.assertEqual(self.fi._session.bodies, [])
+
+
+class ScraperTest(unittest.TestCase):
+
+  def setUp(self):
+    self.fi = FolhaInvest()
+    self.fi._session = _Session({
+      'ordens'      : ORDENS,
+      'carteira'    : CARTEIRA,
+      'cotacoes'    : COTACOES,
+      'negociacoes' : NEGOCIACOES
+    })
+
+  def test_info(self):
+    self.assertEqual(self.fi.info(), Info(
+      capital         = 1000000.5,
+      daily_limit     = 200000.0,
+      remaining_limit = 150000.25,
+      monthly_ranking = 1234,
+      annual_ranking  = 56
+    ))
+
+  def test_orders_status_reads_nested_tags(self):
+    self.assertEqual(self.fi.orders_status(), [
+      OrderStatus(55, 'Compra', 'PETR4', 1000, 12.34, '31/12/2100', 'Pendente'),
+      OrderStatus(56, 'Venda', 'VALE5', 200, 0.0, '01/01/2101', 'Executada')
+    ])
+
+  def test_portfolio_keeps_non_ascii_names(self):
+    portfolio = self.fi.portfolio()
+    self.assertEqual(portfolio.stocks, [
+      Stock('PETR4', u'PETROBRAS PN', 1000, 10.5, 11.0, 11000.0, 500.0, 4.76),
+      Stock('VALE5', u'VALE PNA AÇÃO', 200, 30.0, 29.0, 5800.0, -200.0, -3.33)
+    ])
+    self.assertEqual(portfolio.overview, Overview(983200.0, 16800.0, 1000000.0))
+    self.assertEqual(portfolio.annual_profit,
+                     Profitability(1000000.0, 1000300.0, 0.03))
+    self.assertEqual(portfolio.monthly_profit,
+                     Profitability(990000.0, 1000300.0, 1.04))
+
+  def test_quotations_reads_bold_inside_link(self):
+    self.assertEqual(self.fi.quotations(), [
+      Quote('PETR4', 'PETROBRAS PN', 11.0, '17:05', -1.25,
+            11.1, 11.14, 11.2, 10.9, 12345600),
+      Quote('ABEV3', 'AMBEV ON', 1234.56, '17:06', 2.0,
+            1.1, 1.14, 1.2, 1.9, 100)
+    ])
+
+  def test_simulator_trades_ignores_marker_tables(self):
+    self.assertEqual(self.fi.simulator_trades(), [
+      SimulatorTrade('PETR4', 3, 1, 4),
+      SimulatorTrade('VALE5', 1002, 0, 1002)
+    ])
+
+
+if __name__ == '__main__':
+  unittest.main()